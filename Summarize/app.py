@@ -1,27 +1,34 @@
-import io
+import asyncio
+import hashlib
+import json
 import os
 import re
 import html as html_lib
-from typing import List, Optional
+import tempfile
+import threading
+from typing import IO, Iterator, List, Optional, Tuple
 
 from flask import Flask, render_template, request, redirect, url_for, flash, send_file
 from werkzeug.utils import secure_filename
-from openai import OpenAI
-from pypdf import PdfReader
+from openai import AsyncOpenAI
+import pypdfium2 as pdfium
 from reportlab.lib.pagesizes import LETTER
 from reportlab.lib.units import inch
 from reportlab.pdfgen import canvas
 from dotenv import load_dotenv
+from diskcache import Cache
+from lxml import etree
+from lxml import html as lxml_html
 import logging
 logging.basicConfig(level=logging.DEBUG)
 
 # Local summarization deps
-import nltk
-from sumy.nlp.tokenizers import Tokenizer
+import numpy as np
+import spacy
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
 from sumy.parsers.plaintext import PlaintextParser
 from sumy.summarizers.lex_rank import LexRankSummarizer
-from sumy.summarizers.text_rank import TextRankSummarizer
-from sumy.summarizers.lsa import LsaSummarizer
 
 # Optional segmentation helper
 try:
@@ -29,6 +36,12 @@ try:
 except Exception:  # ImportError or others
     _wordninja = None
 
+# Optional JIT for the exact dedup loop
+try:
+    from numba import njit  # type: ignore
+except Exception:
+    njit = None
+
 
 load_dotenv()
 
@@ -37,44 +50,165 @@ app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret")
 app.config["UPLOAD_FOLDER"] = os.path.join(
     os.path.dirname(__file__), "uploads")
 app.config["MAX_CONTENT_LENGTH"] = 25 * 1024 * 1024  # 25 MB
+# Input budgets so huge PDFs, TXT uploads or pasted text don't flood the text pipeline
+MAX_PDF_PAGES = int(os.environ.get("MAX_PDF_PAGES", 500))
+MAX_INPUT_CHARS = int(os.environ.get("MAX_INPUT_CHARS", 500_000))
 
 # Summarizer mode: "local" or "remote" (OpenAI). Default to local per request.
 SUMMARIZER_MODE = os.environ.get("SUMMARIZER_MODE", "local").lower()
+# Max concurrent chunk requests to OpenAI in remote mode
+REMOTE_MAX_CONCURRENCY = int(os.environ.get("REMOTE_MAX_CONCURRENCY", 10))
+# Medium documents send all chunks in a single prompt when they fit these limits
+REMOTE_MAX_BATCHED = int(os.environ.get("REMOTE_MAX_BATCHED", 5))
+REMOTE_MAX_BATCHED_CHARS = int(os.environ.get("REMOTE_MAX_BATCHED_CHARS", 30000))
 
 os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
-
-def _ensure_nltk():
-    try:
-        nltk.data.find("tokenizers/punkt")
-    except LookupError:
-        try:
-            nltk.download("punkt", quiet=True)
-        except Exception:
-            pass
+# (formatted summary, truncation notice) keyed by input hash, style and mode
+_SUMMARY_CACHE = Cache(os.environ.get(
+    "SUMMARY_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache")))
+
+# Precompiled patterns for PDF cleanup
+# Page headers/footers ('P a g e ...', 'Page 3 of 9') and signature lines in one pass
+_RE_PDF_JUNK = re.compile(
+    r"^\s*(?:"
+    r"P\s*a\s*g\s*e\b.*"
+    r"|Page\s*\d+\s*(?:of|/)\s*\d+\s*"
+    r"|(?-i:Signature)\w*.*"
+    r")$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_RE_DEHYPHEN = re.compile(r"([A-Za-z])-\s*\n\s*([A-Za-z])")
+_RE_WHITESPACE = re.compile(r"\s+")
+_RE_SENTENCE_BREAK = re.compile(r"(\.)\s+(?=[A-Z])")
+
+# Precompiled patterns for whitespace repair
+# camelCase joins, letter/digit and letter/other boundaries; zero-width so one pass inserts every space
+_RE_WORD_BOUNDARY = re.compile(
+    r"(?<=[a-z])(?=[A-Z])"
+    r"|(?<=\D)(?=\d)|(?<=\d)(?=\D)"
+    r"|(?<=[A-Za-z])(?=[^A-Za-z])|(?<=[^A-Za-z])(?=[A-Za-z])"
+)
+# Whole lowercase letter runs long enough to be several words glued together
+_RE_GLUED = re.compile(r"(?<![A-Za-z])[a-z]{12,}(?![A-Za-z])")
+_RE_SPACE_BEFORE_PUNCT = re.compile(r"\s+([.,;:!?])")
+
+# Word tokens for sentence similarity
+_WORD_RE = re.compile(r"\w+")
+
+# Collapses blank-line runs in plain-text output
+_RE_EXTRA_NEWLINES = re.compile(r"\n{3,}")
+# Characters lxml refuses (not XML compatible), and a tag stripper for unparseable input
+_RE_XML_INVALID = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_RE_HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def _load_nlp():
+    # Only sentence boundaries are needed: use the standalone senter, not the parser
     try:
-        nltk.data.find("tokenizers/punkt_tab")
-    except LookupError:
-        try:
-            nltk.download("punkt_tab", quiet=True)
-        except Exception:
-            pass
+        nlp = spacy.load(
+            "en_core_web_sm",
+            exclude=["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"],
+        )
+        nlp.enable_pipe("senter")
+        return nlp
+    except (OSError, ValueError):
+        # Model not installed: fall back to the rule-based sentencizer
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        return nlp
+
+
+_NLP = _load_nlp()
+# spaCy rejects texts over nlp.max_length, so long inputs are fed in bounded pieces
+_NLP_PIECE_CHARS = 100_000
+
+
+def _sent_tokenize(text: str) -> List[str]:
+    pieces = (
+        piece
+        for paragraph in text.split("\n\n")
+        for piece in _chunk_text(paragraph, max_chars=_NLP_PIECE_CHARS)
+    )
+    return [
+        s.text.strip()
+        for doc in _NLP.pipe(pieces)
+        for s in doc.sents
+        if s.text.strip()
+    ]
+
+
+class _SpacyTokenizer:
+    """sumy-compatible tokenizer backed by spaCy instead of NLTK punkt."""
+
+    _WORD_PATTERN = re.compile(r"^[^\W\d_](?:[^\W\d_]|['-])*$", re.UNICODE)
+
+    language = "english"
+
+    def to_sentences(self, paragraph: str):
+        return tuple(_sent_tokenize(paragraph))
+
+    def to_words(self, sentence: str):
+        words = (tok.text for tok in _NLP.tokenizer(sentence))
+        return tuple(w for w in words if self._WORD_PATTERN.search(w))
+
+
+# Stateless between calls, so one instance of each is shared across requests
+_TOKENIZER = _SpacyTokenizer()
+_LEX = LexRankSummarizer()
 
 
 def _allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in {"pdf", "txt"}
 
 
-def _read_pdf_text(file_bytes: bytes) -> str:
-    reader = PdfReader(io.BytesIO(file_bytes))
-    texts: List[str] = []
-    for page in reader.pages:
+# Serializes every PDFium call across request threads (gthread / threaded dev server)
+_PDFIUM_LOCK = threading.Lock()
+
+
+def _looks_like_pdf(file_bytes: bytes) -> bool:
+    # The header may be preceded by junk, but must appear within the first 1024 bytes
+    return b"%PDF-" in file_bytes[:1024]
+
+
+def _truncate_text(text: str) -> Tuple[str, bool]:
+    if len(text) <= MAX_INPUT_CHARS:
+        return text, False
+    cut = text.rfind(" ", 0, MAX_INPUT_CHARS)
+    return text[:cut if cut > 0 else MAX_INPUT_CHARS], True
+
+
+def _read_pdf_text(file_bytes: bytes) -> Tuple[str, int, int]:
+    # Returns (text, pages read, total pages); stops early once MAX_INPUT_CHARS is exceeded
+    # PDFium must never be entered from two threads at once, even for separate
+    # documents, so all of it (open, pages, textpages, close) runs under one lock
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(file_bytes)
+        texts: List[str] = []
+        total_chars = 0
         try:
-            page_text = page.extract_text() or ""
-        except Exception:
-            page_text = ""
-        texts.append(page_text)
-    return "\n\n".join(texts)
+            page_count = len(pdf)
+            if page_count > MAX_PDF_PAGES:
+                raise ValueError(f"PDF has {page_count} pages; the limit is {MAX_PDF_PAGES}.")
+            for i in range(page_count):
+                if total_chars > MAX_INPUT_CHARS:
+                    break
+                page = pdf[i]
+                textpage = None
+                try:
+                    textpage = page.get_textpage()
+                    page_text = textpage.get_text_range() or ""
+                except Exception:
+                    page_text = ""
+                finally:
+                    if textpage is not None:
+                        textpage.close()
+                    page.close()
+                texts.append(page_text)
+                total_chars += len(page_text)
+        finally:
+            pdf.close()
+    return "\n\n".join(texts), len(texts), page_count
 
 
 def _clean_pdf_artifacts(text: str) -> str:
@@ -83,17 +217,13 @@ def _clean_pdf_artifacts(text: str) -> str:
     t = text
     t = t.replace("\r\n", "\n").replace("\r", "\n")
     # Remove spaced-out 'Page' or page headers/footers
-    t = re.sub(r"^\s*(P\s*a\s*g\s*e\b.*)$", "", t, flags=re.IGNORECASE | re.MULTILINE)
-    t = re.sub(r"^\s*Page\s*\d+\s*(of|/)\s*\d+\s*$", "", t, flags=re.IGNORECASE | re.MULTILINE)
-    t = re.sub(r"^\s*Signature\w*.*$", "", t, flags=re.MULTILINE)
+    t = _RE_PDF_JUNK.sub("", t)
     # De-hyphenate line breaks
-    t = re.sub(r"([A-Za-z])-\s*\n\s*([A-Za-z])", r"\1\2", t)
-    # Collapse single newlines within paragraphs to spaces (preserve blank lines)
-    t = re.sub(r"(?<!\n)\n(?!\n)", " ", t)
-    # Normalize excessive spaces
-    t = re.sub(r"\s+", " ", t)
+    t = _RE_DEHYPHEN.sub(r"\1\2", t)
+    # Collapse newlines and excessive spaces
+    t = _RE_WHITESPACE.sub(" ", t)
     # Restore paragraph breaks roughly
-    t = re.sub(r"(\.)\s+(?=[A-Z])", r"\1\n\n", t)
+    t = _RE_SENTENCE_BREAK.sub(r"\1\n\n", t)
     return t.strip()
 
 
@@ -101,131 +231,302 @@ def _repair_whitespace(raw: str) -> str:
     if not raw:
         return ""
     text = raw
-    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
-    text = re.sub(r"(\D)(\d)", r"\1 \2", text)
-    text = re.sub(r"(\d)(\D)", r"\1 \2", text)
+    text = _RE_WORD_BOUNDARY.sub(" ", text)
     text = text.replace("/", "/ ")
-    tokens = []
-    for token in re.findall(r"[A-Za-z]+|[^A-Za-z]+", text):
-        if (
-            _wordninja is not None
-            and token.isalpha()
-            and token.lower() == token
-            and (len(token) > 18 or re.search(r"[a-z]{12,}", token))
-        ):
-            tokens.extend(_wordninja.split(token))
-        else:
-            tokens.append(token)
-    text = " ".join(tokens)
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"\s+([.,;:!?])", r"\1", text)
-    lines = [line.strip() for line in text.splitlines()]
-    return "\n".join(line for line in lines if line)
-
-
-def _chunk_text(text: str, max_chars: int = 6000) -> List[str]:
+    if _wordninja is not None:
+        text = _RE_GLUED.sub(lambda m: " ".join(_wordninja.split(m.group())), text)
+    text = _RE_WHITESPACE.sub(" ", text)
+    text = _RE_SPACE_BEFORE_PUNCT.sub(r"\1", text)
+    # Whitespace is already collapsed, so no line breaks remain
+    return text.strip()
+
+
+def _chunk_text(text: str, max_chars: int = 6000) -> Iterator[str]:
     if not text:
-        return []
+        return
     text = text.replace("\r\n", "\n").replace("\r", "\n")
-    chunks: List[str] = []
     start = 0
     length = len(text)
     while start < length:
         end = min(start + max_chars, length)
-        slice_text = text[start:end]
-        last_period = slice_text.rfind(". ")
-        if last_period != -1 and end != length and last_period > int(0.6 * len(slice_text)):
-            end = start + last_period + 1
-        chunks.append(text[start:end].strip())
+        # Search in place rather than copying the window
+        last_period = text.rfind(". ", start, end)
+        if last_period != -1 and end != length and last_period - start > int(0.6 * (end - start)):
+            end = last_period + 1
+        chunk = text[start:end].strip()
+        if chunk:
+            yield chunk
         start = end
-    return [c for c in chunks if c]
 
 
-def _get_openai_client() -> OpenAI:
+def _get_openai_client() -> AsyncOpenAI:
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError(
             "OPENAI_API_KEY is not set. Add it to your environment or .env file.")
-    return OpenAI(api_key=api_key)
+    return AsyncOpenAI(api_key=api_key)
+
 
+_SYSTEM_PROMPT = "You are a world-class summarizer. Write concise, factual summaries using clear headings and bullet points where helpful."
 
-def _summarize_chunk_remote(client: OpenAI, text: str, model: str = "gpt-4o-mini") -> str:
-    response = client.chat.completions.create(
+
+def _chunk_request_body(text: str, model: str = "gpt-4o-mini") -> dict:
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": f"Summarize the following text. Preserve key facts, entities, data, and definitions.\n\n{text}"},
+        ],
+        "temperature": 0.3,
+        "max_tokens": 700,
+    }
+
+
+async def _summarize_chunk_remote(client: AsyncOpenAI, text: str, model: str = "gpt-4o-mini") -> str:
+    response = await client.chat.completions.create(**_chunk_request_body(text, model))
+    return (response.choices[0].message.content or "").strip()
+
+
+async def _summarize_chunks_single_prompt(client: AsyncOpenAI, chunks: List[str],
+                                          model: str = "gpt-4o-mini") -> List[str]:
+    passages = "\n\n".join(f"[{i}] {chunk}" for i, chunk in enumerate(chunks, 1))
+    response = await client.chat.completions.create(
         model=model,
         messages=[
-            {"role": "system", "content": "You are a world-class summarizer. Write concise, factual summaries using clear headings and bullet points where helpful."},
-            {"role": "user", "content": f"Summarize the following text. Preserve key facts, entities, data, and definitions.\n\n{text}"},
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": (
+                f"Summarize each of the following {len(chunks)} passages. Preserve key facts, entities, data, and definitions. "
+                f'Return a JSON object of the form {{"summaries": [...]}} holding exactly {len(chunks)} strings, one per passage, in order.\n\n'
+                + passages
+            )},
         ],
         temperature=0.3,
-        max_tokens=700,
+        max_tokens=700 * len(chunks),
+        response_format={"type": "json_object"},
     )
-    return (response.choices[0].message.content or "").strip()
+    summaries = json.loads(response.choices[0].message.content or "{}").get("summaries")
+    if not isinstance(summaries, list) or len(summaries) != len(chunks):
+        raise ValueError("Batched prompt returned the wrong number of summaries")
+    return [str(summary).strip() for summary in summaries]
 
 
-def _summarize_text_remote(text: str) -> str:
-    client = _get_openai_client()
+async def _summarize_text_remote_async(text: str) -> str:
+    # Close the connection pool while the event loop is still running
+    async with _get_openai_client() as client:
+        return await _summarize_text_with_client(client, text)
+
+
+async def _summarize_text_with_client(client: AsyncOpenAI, text: str) -> str:
     text = (text or "").strip()
     if not text:
         return ""
     if len(text) <= 6000:
-        return _summarize_chunk_remote(client, text)
-    chunks = _chunk_text(text, max_chars=6000)
-    intermediate_summaries = [_summarize_chunk_remote(
-        client, chunk) for chunk in chunks]
+        return await _summarize_chunk_remote(client, text)
+    # Materialized: the single-prompt path needs the count and total size up front
+    chunks = list(_chunk_text(text, max_chars=6000))
+    # Chunks are independent, so fan them out with a cap on in-flight requests
+    semaphore = asyncio.Semaphore(REMOTE_MAX_CONCURRENCY)
+
+    async def _bounded(chunk: str) -> str:
+        async with semaphore:
+            return await _summarize_chunk_remote(client, chunk)
+
+    intermediate_summaries: Optional[List[str]] = None
+    if len(chunks) <= REMOTE_MAX_BATCHED and sum(map(len, chunks)) <= REMOTE_MAX_BATCHED_CHARS:
+        try:
+            intermediate_summaries = await _summarize_chunks_single_prompt(client, chunks)
+        except Exception:
+            logging.exception("Batched prompt failed; summarizing chunks separately")
+    if intermediate_summaries is None:
+        intermediate_summaries = await asyncio.gather(*(_bounded(chunk) for chunk in chunks))
     combined = "\n\n".join(intermediate_summaries)
     final_prompt = (
         "Combine the following partial summaries into a single, coherent summary. "
         "Remove duplicates, maintain structure with clear headings, and include 5-10 key bullet points at the end.\n\n" + combined
     )
-    return _summarize_chunk_remote(client, final_prompt)
+    return await _summarize_chunk_remote(client, final_prompt)
+
 
+def _summarize_text_remote(text: str) -> str:
+    return asyncio.run(_summarize_text_remote_async(text))
 
-def _jaccard(a: str, b: str) -> float:
-    wa = set(re.findall(r"\w+", a.lower()))
-    wb = set(re.findall(r"\w+", b.lower()))
+
+def _word_set(text: str) -> frozenset:
+    return frozenset(_WORD_RE.findall(text.lower()))
+
+
+def _jaccard(wa: frozenset, wb: frozenset) -> float:
     if not wa or not wb:
         return 0.0
-    return len(wa & wb) / len(wa | wb)
+    if len(wa) > len(wb):
+        wa, wb = wb, wa
+    # |A ∪ B| = |A| + |B| - |A ∩ B|, so the union is never built
+    inter = len(wa.intersection(wb))
+    return inter / (len(wa) + len(wb) - inter)
+
+
+def _jaccard_dedup_mask(flat: np.ndarray, offsets: np.ndarray, threshold: float) -> np.ndarray:
+    # Sentence i owns flat[offsets[i]:offsets[i + 1]], a sorted array of token ids
+    n = offsets.shape[0] - 1
+    keep = np.zeros(n, dtype=np.bool_)
+    kept = np.empty(n, dtype=np.int64)
+    n_kept = 0
+    for i in range(n):
+        a_start, a_end = offsets[i], offsets[i + 1]
+        la = a_end - a_start
+        duplicate = False
+        for k in range(n_kept):
+            j = kept[k]
+            b_start, b_end = offsets[j], offsets[j + 1]
+            lb = b_end - b_start
+            if la == 0 or lb == 0:
+                continue
+            # Two-pointer walk over both sorted id lists
+            p, q, inter = a_start, b_start, 0
+            while p < a_end and q < b_end:
+                if flat[p] == flat[q]:
+                    inter += 1
+                    p += 1
+                    q += 1
+                elif flat[p] < flat[q]:
+                    p += 1
+                else:
+                    q += 1
+            if inter / (la + lb - inter) >= threshold:
+                duplicate = True
+                break
+        if not duplicate:
+            keep[i] = True
+            kept[n_kept] = i
+            n_kept += 1
+    return keep
+
+
+if njit is not None:
+    _jaccard_dedup_mask = njit(cache=True)(_jaccard_dedup_mask)
+
+
+def _dedupe_sentences_jit(candidates: List[str], threshold: float) -> List[str]:
+    vocab: dict = {}
+    id_sets = [
+        sorted({vocab.setdefault(t, len(vocab)) for t in _word_set(s)})
+        for s in candidates
+    ]
+    offsets = np.zeros(len(id_sets) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(ids) for ids in id_sets])
+    flat = np.fromiter((i for ids in id_sets for i in ids), dtype=np.int32, count=int(offsets[-1]))
+    keep = _jaccard_dedup_mask(flat, offsets, threshold)
+    return [s for s, k in zip(candidates, keep) if k]
+
+
+def _dedupe_sentences(candidates: List[str], threshold: float = 0.85) -> List[str]:
+    if njit is not None:
+        return _dedupe_sentences_jit(candidates, threshold)
+    unique: List[str] = []
+    unique_tokens: List[frozenset] = []
+    for s in candidates:
+        tokens = _word_set(s)
+        if all(_jaccard(tokens, t) < threshold for t in unique_tokens):
+            unique.append(s)
+            unique_tokens.append(tokens)
+    return unique
 
 
 def _summarize_text_local(text: str, max_sentences: Optional[int] = None) -> str:
     # Legacy simple LexRank path retained for safety but unused by enhanced path
-    _ensure_nltk()
     text = (text or "").strip()
     if not text:
         return ""
     if max_sentences is None:
         approx = max(3, min(12, len(text) // 350))
         max_sentences = approx
-    parser = PlaintextParser.from_string(text, Tokenizer("english"))
-    summarizer = LexRankSummarizer()
-    sentences = summarizer(parser.document, max_sentences)
+    parser = PlaintextParser.from_string(text, _TOKENIZER)
+    sentences = _LEX(parser.document, max_sentences)
     return "\n".join(str(s) for s in sentences)
 
 
+def _power_iteration(matrix: np.ndarray, damping: float = 1.0, epsilon: float = 1e-4,
+                     max_iter: int = 100) -> np.ndarray:
+    # Stationary distribution of a row-stochastic matrix (PageRank when damping < 1)
+    n = matrix.shape[0]
+    scores = np.full(n, 1.0 / n)
+    transposed = matrix.T
+    for _ in range(max_iter):
+        updated = (1.0 - damping) / n + damping * transposed.dot(scores)
+        if np.abs(updated - scores).sum() < epsilon:
+            return updated
+        scores = updated
+    return scores
+
+
+def _row_normalize(matrix: np.ndarray) -> np.ndarray:
+    sums = matrix.sum(axis=1, keepdims=True)
+    n = matrix.shape[0]
+    # Dangling sentences link uniformly to every sentence
+    return np.where(sums > 0, matrix / np.where(sums > 0, sums, 1.0), 1.0 / n)
+
+
+def _lex_rank_scores(similarity: np.ndarray, threshold: float = 0.1) -> np.ndarray:
+    adjacency = (similarity >= threshold).astype(float)
+    return _power_iteration(_row_normalize(adjacency))
+
+
+def _text_rank_scores(similarity: np.ndarray, damping: float = 0.85) -> np.ndarray:
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0.0)
+    return _power_iteration(_row_normalize(weights), damping=damping)
+
+
+def _lsa_scores(tfidf, max_dimensions: int = 3) -> np.ndarray:
+    n_components = min(tfidf.shape[0], tfidf.shape[1]) - 1
+    if n_components < 1:
+        return np.asarray(tfidf.sum(axis=1)).ravel()
+    # Deliberately keep only the top singular vectors: TF-IDF rows are L2-normalised,
+    # so at full rank every sentence's norm (and therefore score) would be 1
+    svd = TruncatedSVD(n_components=min(max_dimensions, n_components), random_state=0)
+    # Score is the norm of each sentence's row in U·Σ over the kept dimensions
+    projected = svd.fit_transform(tfidf)
+    return np.sqrt((projected ** 2).sum(axis=1))
+
+
+def _top_k(scores: np.ndarray, k: int) -> List[int]:
+    # Highest-scoring indices, returned in document order
+    return sorted(np.argsort(-scores, kind="stable")[:k].tolist())
+
+
 def _summarize_text_local_enhanced(text: str) -> str:
-    _ensure_nltk()
     normalized = (text or "").strip()
     if not normalized:
         return ""
-    parser = PlaintextParser.from_string(normalized, Tokenizer("english"))
+    try:
+        sentences = _sent_tokenize(normalized)
+    except Exception:
+        sentences = [s.strip() for s in normalized.split(".") if s.strip()]
+    if not sentences:
+        return ""
 
     # Budget sentences by length, slightly higher than legacy for clarity
     budget = max(5, min(15, len(normalized) // 300))
 
+    # One TF-IDF matrix and similarity graph shared by all three rankers
+    try:
+        tfidf = TfidfVectorizer().fit_transform(sentences)
+    except ValueError:  # no usable vocabulary
+        return "\n".join(sentences[:budget])
+    similarity = tfidf.dot(tfidf.T).toarray()
+
     candidates: List[str] = []
-    for SummCls in (LexRankSummarizer, TextRankSummarizer, LsaSummarizer):
+    for scorer in (
+        lambda: _lex_rank_scores(similarity),
+        lambda: _text_rank_scores(similarity),
+        lambda: _lsa_scores(tfidf),
+    ):
         try:
-            s = SummCls()(parser.document, budget)
-            candidates.extend(str(x) for x in s)
+            candidates.extend(sentences[i] for i in _top_k(scorer(), budget))
         except Exception:
             continue
 
-    # Deduplicate similar sentences
-    unique: List[str] = []
-    for s in candidates:
-        if all(_jaccard(s, t) < 0.85 for t in unique):
-            unique.append(s)
+    unique = _dedupe_sentences(candidates)
 
     # Keep order as in original text for readability
     ordering = {s: normalized.find(s) for s in unique}
@@ -234,19 +535,17 @@ def _summarize_text_local_enhanced(text: str) -> str:
 
 
 def _format_summary_with_style(text: str, style: str) -> str:
-    _ensure_nltk()
     clean = (text or "").strip()
     if not clean:
         return ""
     try:
-        sentences = nltk.sent_tokenize(clean)
+        sentences = _sent_tokenize(clean)
     except Exception:
         sentences = [s.strip() for s in clean.split(".") if s.strip()]
 
+    # Collect fragments and join once instead of building intermediate strings
+    parts: List[str] = []
     if style == "study":
-        key_points_items = "".join(
-            f"<li>{s}</li>" for s in sentences[: max(3, min(8, len(sentences)))]
-        )
         # Rotate varied question templates
         templates = [
             "Why is {} important?",
@@ -257,33 +556,42 @@ def _format_summary_with_style(text: str, style: str) -> str:
             "Where is {} applied effectively?",
             "How could {} be improved?",
         ]
-        q_items = []
+        parts.extend((
+            "<b>Study Notes</b><br/><br/>",
+            "<b>Overview</b><br/>",
+            sentences[0] if sentences else clean,
+            "<br/><br/>",
+            "<b>Key Points</b><ul>",
+        ))
+        parts.extend(f"<li>{s}</li>" for s in sentences[: max(3, min(8, len(sentences)))])
+        parts.append("</ul><b>Potential Questions</b><ul>")
         max_q = max(3, min(5, len(sentences)))
         for i, s in enumerate(sentences[:max_q]):
             snippet = s.strip()
             snippet = snippet.replace("\n", " ").strip()
             snippet = snippet[:90].rstrip(" .,:;!?")
-            q_items.append(f"<li>{templates[i % len(templates)].format(snippet)}</li>")
-        questions_items = "".join(q_items)
-        body = (
-            "<b>Study Notes</b><br/><br/>"
-            "<b>Overview</b><br/>"
-            f"{sentences[0] if sentences else clean}<br/><br/>"
-            "<b>Key Points</b>"
-            f"<ul>{key_points_items}</ul>"
-            "<b>Potential Questions</b>"
-            f"<ul>{questions_items}</ul>"
-        )
+            parts.append(f"<li>{templates[i % len(templates)].format(snippet)}</li>")
+        parts.append("</ul>")
+        body = "".join(parts)
     elif style == "abstract":
         body = " ".join(sentences)
         body = body.replace("\n", "<br/>")
     else:  # bullets (default)
-        body = "<ul>" + "".join(f"<li>{s}</li>" for s in sentences) + "</ul>"
+        parts.append("<ul>")
+        parts.extend(f"<li>{s}</li>" for s in sentences)
+        parts.append("</ul>")
+        body = "".join(parts)
 
-    word_count = len(re.findall(r"\b\w+\b", body))
+    # Count matches without materializing them; maximal \w+ runs are the same as \b\w+\b
+    word_count = sum(1 for _ in _WORD_RE.finditer(body))
     return f"{body}<br/><br/><b>Word count:</b> {word_count}"
 
 
+def _summary_cache_key(source: bytes, file_ext: Optional[str], style: str) -> str:
+    digest = hashlib.blake2b(source, digest_size=16).hexdigest()
+    return f"{digest}:{file_ext or 'text'}:{style}:{SUMMARIZER_MODE}"
+
+
 @app.route("/", methods=["GET"])
 def landing():
     return render_template("landing.html")
@@ -305,25 +613,52 @@ def summarize():
         return redirect(url_for("app_page"))
 
     text_to_summarize = input_text
+    source_bytes = input_text.encode("utf-8")
 
     is_pdf = False
+    file_ext = None
     if uploaded_file and uploaded_file.filename:
         filename = secure_filename(uploaded_file.filename)
         if not _allowed_file(filename):
             flash("Only PDF or TXT files are supported.")
             return redirect(url_for("app_page"))
         file_ext = filename.rsplit(".", 1)[1].lower()
-        file_bytes = uploaded_file.read()
-        if file_ext == "pdf":
-            is_pdf = True
-            try:
-                text_to_summarize = _read_pdf_text(file_bytes)
-                text_to_summarize = _clean_pdf_artifacts(text_to_summarize)
-            except Exception as e:
-                flash(f"Failed to read PDF: {e}")
-                return redirect(url_for("app_page"))
-        elif file_ext == "txt":
-            text_to_summarize = file_bytes.decode("utf-8", errors="ignore")
+        source_bytes = uploaded_file.read()
+
+    cache_key = _summary_cache_key(source_bytes, file_ext, style)
+    cached = _SUMMARY_CACHE.get(cache_key)
+    if isinstance(cached, tuple):
+        summary, notice = cached
+        # Replay the truncation warning the original run showed
+        if notice:
+            flash(notice)
+        return render_template("result.html", summary=summary)
+
+    notice = None
+
+    if file_ext == "pdf":
+        is_pdf = True
+        if not _looks_like_pdf(source_bytes):
+            flash("The uploaded file is not a valid PDF.")
+            return redirect(url_for("app_page"))
+        try:
+            text_to_summarize, pages_read, page_count = _read_pdf_text(source_bytes)
+            text_to_summarize = _clean_pdf_artifacts(text_to_summarize)
+        except Exception as e:
+            flash(f"Failed to read PDF: {e}")
+            return redirect(url_for("app_page"))
+        if pages_read < page_count:
+            notice = f"Document truncated to the first {pages_read} of {page_count} pages."
+    elif file_ext == "txt":
+        text_to_summarize = source_bytes.decode("utf-8", errors="ignore")
+
+    # Same budget for TXT and pasted text; also caps a PDF whose last page overshot it
+    total_chars = len(text_to_summarize)
+    text_to_summarize, cut = _truncate_text(text_to_summarize)
+    if cut and not notice:
+        notice = f"Document truncated to the first {len(text_to_summarize)} of {total_chars} characters."
+    if notice:
+        flash(notice)
 
     # Repair spacing issues from PDFs or pasted text
     text_to_summarize = _repair_whitespace(text_to_summarize)
@@ -332,6 +667,7 @@ def summarize():
         flash("No readable text found in the provided input.")
         return redirect(url_for("app_page"))
 
+    fell_back = False
     if SUMMARIZER_MODE == "local":
         summary = _summarize_text_local_enhanced(text_to_summarize)
     else:
@@ -340,23 +676,48 @@ def summarize():
         except Exception:
             summary = _summarize_text_local_enhanced(text_to_summarize)
             flash("Falling back to offline summarizer.")
+            fell_back = True
 
     summary = _format_summary_with_style(summary, style)
+    # Don't pin a fallback result under the remote-mode key
+    if not fell_back:
+        _SUMMARY_CACHE.set(cache_key, (summary, notice))
     return render_template("result.html", summary=summary)
 
 
 def _html_to_plain_text(html_input: str) -> str:
-    if not html_input:
+    if not html_input or not html_input.strip():
         return ""
-    text = html_lib.unescape(html_input)
-    text = re.sub(r"(?is)<li\s*>\s*(.*?)\s*</li\s*>", r"• \1\n", text)
-    text = re.sub(r"(?is)<br\s*/?>", "\n", text)
-    text = re.sub(r"(?is)</p\s*>", "\n\n", text)
-    text = re.sub(r"(?is)<p\s*>", "", text)
-    text = re.sub(r"(?is)</?b\s*>", "", text)
-    text = re.sub(r"(?is)</?(ul|ol)\s*>", "", text)
-    text = re.sub(r"(?is)<[^>]+>", "", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    # /download accepts any posted summary, so drop characters lxml rejects
+    cleaned = _RE_XML_INVALID.sub("", html_input)
+    try:
+        root = lxml_html.fragment_fromstring(cleaned, create_parent="div")
+    except (ValueError, AssertionError, etree.ParserError):
+        text = html_lib.unescape(_RE_HTML_TAG.sub("", cleaned))
+        return _RE_EXTRA_NEWLINES.sub("\n\n", text).strip()
+    parts: List[str] = []
+    # Single walk over the tree: bullets for <li>, line breaks for <br>/<p>
+    walker = etree.iterwalk(root, events=("start", "end", "comment", "pi"))
+    for event, el in walker:
+        if event in ("comment", "pi"):
+            if el.tail:
+                parts.append(el.tail)
+            continue
+        tag = el.tag.lower()
+        if event == "start":
+            if tag == "li":
+                parts.append(f"• {el.text_content().strip()}\n")
+                walker.skip_subtree()
+            elif el.text:
+                parts.append(el.text)
+            continue
+        if tag == "br":
+            parts.append("\n")
+        elif tag == "p":
+            parts.append("\n\n")
+        if el is not root and el.tail:
+            parts.append(el.tail)
+    text = _RE_EXTRA_NEWLINES.sub("\n\n", "".join(parts))
     return text.strip()
 
 
@@ -368,18 +729,25 @@ def download():
         return redirect(url_for("app_page"))
 
     plain_text = _html_to_plain_text(summary)
-    pdf_bytes = _build_pdf(plain_text)
+    # Spools to disk past 1 MB so concurrent downloads don't each hold a full PDF in RAM
+    spooled = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+    try:
+        _build_pdf(plain_text, spooled)
+        spooled.seek(0)
+    except Exception:
+        spooled.close()
+        raise
+    # Werkzeug's file wrapper streams the file and closes it when the response closes
     return send_file(
-        pdf_bytes,
+        spooled,
         as_attachment=True,
         download_name="summary.pdf",
         mimetype="application/pdf",
     )
 
 
-def _build_pdf(summary_text: str) -> io.BytesIO:
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=LETTER)
+def _build_pdf(summary_text: str, out: IO[bytes]) -> None:
+    c = canvas.Canvas(out, pagesize=LETTER)
     width, height = LETTER
 
     left_margin = 1 * inch
@@ -388,31 +756,37 @@ def _build_pdf(summary_text: str) -> io.BytesIO:
     bottom_margin = 1 * inch
     usable_width = width - left_margin - right_margin
 
+    font_name, font_size = "Times-Roman", 12
     text_obj = c.beginText()
     text_obj.setTextOrigin(left_margin, height - top_margin)
-    text_obj.setFont("Times-Roman", 12)
+    text_obj.setFont(font_name, font_size)
 
+    # Standard-font widths are additive, so measure each word once and sum
+    space_width = c.stringWidth(" ", font_name, font_size)
     for line in summary_text.splitlines():
         if not line.strip():
             text_obj.textLine("")
             continue
-        words = line.split(" ")
-        current = ""
-        for word in words:
-            candidate = f"{current} {word}".strip()
-            if c.stringWidth(candidate, "Times-Roman", 12) <= usable_width:
-                current = candidate
+        current: List[str] = []
+        current_width = 0.0
+        for word in line.split(" "):
+            if not word:
+                continue
+            word_width = c.stringWidth(word, font_name, font_size)
+            # A word wider than the line starts it as-is, with no blank line before it
+            if current and current_width + space_width + word_width > usable_width:
+                text_obj.textLine(" ".join(current))
+                current = [word]
+                current_width = word_width
             else:
-                text_obj.textLine(current)
-                current = word
+                current_width += word_width + (space_width if current else 0.0)
+                current.append(word)
         if current:
-            text_obj.textLine(current)
+            text_obj.textLine(" ".join(current))
 
     c.drawText(text_obj)
     c.showPage()
     c.save()
-    buffer.seek(0)
-    return buffer
 
 
 if __name__ == "__main__":
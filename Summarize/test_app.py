@@ -0,0 +1,24 @@
+import app as summarize_app
+
+
+def test_html_to_plain_text_drops_xml_incompatible_characters():
+    summary = "Revenue grew strongly this year. Costs fell sharply.\x07 Profit doubled overall.\x0b\x1b\ufffe"
+    assert summarize_app._html_to_plain_text(summary) == (
+        "Revenue grew strongly this year. Costs fell sharply. Profit doubled overall."
+    )
+
+
+def test_html_to_plain_text_falls_back_on_unparseable_fragment():
+    assert summarize_app._html_to_plain_text("<html>") == ""
+    assert summarize_app._html_to_plain_text("<html><b>Word</b> &amp; count") == "Word & count"
+
+
+def test_download_accepts_control_characters():
+    client = summarize_app.app.test_client()
+    response = client.post(
+        "/download",
+        data={"summary": "Revenue grew strongly this year. Costs fell sharply.\x07 Profit doubled overall."},
+    )
+    assert response.status_code == 200
+    assert response.data.startswith(b"%PDF")
+    response.close()